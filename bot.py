@@ -32,6 +32,23 @@ MCP_SERVER_URL = (os.getenv("MCP_SERVER_URL", "") or "http://localhost:8081/sse"
 # Context cut-off: max messages sent to the LLM (0 = no limit)
 CONTEXT_MAX_MESSAGES = int(os.getenv("CONTEXT_MAX_MESSAGES", "0"))
 
+# Greeting bank: play a precomputed greeting at session start instead of generating one (Kokoro only)
+GREETING_BANK = (os.getenv("GREETING_BANK", "") or "1").strip().lower() in ("1", "true", "yes")
+GREETING_BANK_DIR = os.getenv("GREETING_BANK_DIR", "greetings")
+GREETING_VARIANTS = int(os.getenv("GREETING_VARIANTS", "4"))
+
+# Runtime control: local HTTP endpoint to switch personality/voice/speed mid-session (0 = off)
+CONTROL_HOST = os.getenv("CONTROL_HOST", "127.0.0.1")
+CONTROL_PORT = int(os.getenv("CONTROL_PORT", "0"))
+
+# Frame tracing: ring buffer of frame events, dumped as Chrome trace JSON (see frame_trace.py)
+TRACE_ENABLED = (os.getenv("TRACE", "") or "").strip().lower() in ("1", "true", "yes")
+TRACE_BUFFER_SIZE = int(os.getenv("TRACE_BUFFER_SIZE", "65536"))
+TRACE_SAMPLE_EVERY = int(os.getenv("TRACE_SAMPLE_EVERY", "1"))  # Keep 1 in N non-marker frames
+TRACE_SLOW_TURN_MS = int(os.getenv("TRACE_SLOW_TURN_MS", "0"))  # Auto-dump turns slower than this (0 = off)
+TRACE_DUMP_SECONDS = float(os.getenv("TRACE_DUMP_SECONDS", "60"))  # Dump last N seconds on exit (0 = off)
+TRACE_DIR = os.getenv("TRACE_DIR", "traces")
+
 # Personality: assistant, jarvis, storyteller, conspiracy, unhinged, sexy, argumentative
 PERSONALITY = (os.getenv("PERSONALITY", "") or "assistant").strip().lower()
 VOICE_GENDER = (os.getenv("VOICE_GENDER", "") or "").strip().lower()  # male | female; default per personality
@@ -122,18 +139,40 @@ PERSONALITIES: dict[str, dict] = {
 }
 
 
-def get_personality_config():
-    """Resolve PERSONALITY and VOICE_GENDER to system prompt, greeting, and Kokoro voice."""
-    key = PERSONALITY if PERSONALITY in PERSONALITIES else "assistant"
+def get_personality_config(personality: str | None = None, voice_gender: str | None = None):
+    """Resolve personality and voice gender (default: PERSONALITY, VOICE_GENDER) to system prompt, greeting, and Kokoro voice."""
+    personality = PERSONALITY if personality is None else personality
+    voice_gender = VOICE_GENDER if voice_gender is None else voice_gender
+    key = personality if personality in PERSONALITIES else "assistant"
     cfg = PERSONALITIES[key]
     default_gender = cfg.get("default_gender", "female")
-    if VOICE_GENDER == "male":
+    if voice_gender == "male":
         voice = cfg["voice_male"]
-    elif VOICE_GENDER == "female":
+    elif voice_gender == "female":
         voice = cfg["voice_female"]
     else:
         voice = cfg["voice_male"] if default_gender == "male" else cfg["voice_female"]
-    return {"system": cfg["system"], "greeting": cfg["greeting"], "voice": voice}
+    return {"personality": key, "system": cfg["system"], "greeting": cfg["greeting"], "voice": voice}
+
+
+def personality_voices() -> set[str]:
+    """Every Kokoro voice named in PERSONALITIES (plus KOKORO_VOICE), for preloading."""
+    voices = {cfg[k] for cfg in PERSONALITIES.values() for k in ("voice_female", "voice_male")}
+    if KOKORO_VOICE.strip():
+        voices.add(KOKORO_VOICE.strip())
+    return voices
+
+
+def build_system_prompt(system_content: str, tools=None) -> str:
+    """System prompt for the LLM context; adds MCP tool-use guidance when tools are registered."""
+    if not tools:
+        return system_content
+    return system_content.rstrip() + (
+        "\n\nYou have access to MCP tools. "
+        "Before calling a tool, say only one short sentence describing what you are doing (e.g. 'Searching the web for the latest news on Labor Minister.' or 'Checking the opening hours of Shopping on Clyde for you.'). No extra explanation. "
+        "After you have tool results, give a concise summary in plain spoken language. No markdown (no bullets, asterisks, or code). Then suggest exactly two follow-up actions the user might want based on the data (e.g. 'Would you like me to dig into the first article or check another source?'). "
+        "When the user asks for web info: first call the search tool with a query, then for up to 5 result URLs call the fetch_page tool to get full page content, then summarize and offer two follow-up options."
+    )
 
 
 def print_banner():
@@ -148,13 +187,14 @@ def print_banner():
 
 def _reload_config_from_env():
     """Re-read overridable config from os.environ into module globals."""
-    global PERSONALITY, KOKORO_SPEED, VOICE_GENDER
+    global PERSONALITY, KOKORO_SPEED, VOICE_GENDER, TRACE_ENABLED
     PERSONALITY = (os.getenv("PERSONALITY", "") or "assistant").strip().lower()
     try:
         KOKORO_SPEED = float(os.getenv("KOKORO_SPEED", "1.0"))
     except ValueError:
         KOKORO_SPEED = 1.0
     VOICE_GENDER = (os.getenv("VOICE_GENDER", "") or "").strip().lower()
+    TRACE_ENABLED = (os.getenv("TRACE", "") or "").strip().lower() in ("1", "true", "yes")
 
 
 def run_interactive():
@@ -216,12 +256,17 @@ def parse_args(argv=None):
     p.add_argument("--personality", type=str, default=None, metavar="NAME", help="Override PERSONALITY (e.g. jarvis)")
     p.add_argument("--speed", type=float, default=None, metavar="FLOAT", help="Override KOKORO_SPEED (0.5–2.0)")
     p.add_argument("--voice-gender", type=str, default=None, choices=("male", "female"), metavar="GENDER", help="Override VOICE_GENDER")
+    p.add_argument("--build-greetings", action="store_true", help="Generate the greeting bank (text + Kokoro audio) and exit")
+    p.add_argument("--trace", action="store_true", help="Record frame traces (Chrome trace JSON in TRACE_DIR)")
     args, remaining = p.parse_known_args(argv)
     return args, remaining
 
 
 async def run_bot(transport):
     """Core bot logic: pipeline with STT -> LLM -> TTS. Transport-agnostic."""
+    import time
+    # Session clock for connect-to-first-audio: includes model loading and greeting preparation below
+    connected_at = time.monotonic()
     from loguru import logger
     from pipecat.frames.frames import LLMRunFrame
     from pipecat.pipeline.pipeline import Pipeline
@@ -323,7 +368,14 @@ async def run_bot(transport):
                 sample_rate=24000,
                 speed=KOKORO_SPEED,
             )
-            await _run_pipeline(transport, stt, llm, tts, pcfg["system"], pcfg["greeting"], tools)
+            # With runtime control on, preload every personality voicepack so switches don't hit disk/network
+            if CONTROL_PORT:
+                await tts.preload_voices(personality_voices())
+            greeting = None
+            if GREETING_BANK:
+                from greeting_bank import prepare_greeting
+                greeting = await prepare_greeting(tts, GREETING_BANK_DIR, pcfg["personality"], voice, KOKORO_SPEED)
+            await _run_pipeline(transport, stt, llm, tts, pcfg["system"], pcfg["greeting"], tools, greeting, connected_at)
         except ImportError:
             logger.error("Kokoro TTS: install with  uv sync --extra kokoro  (or pip install kokoro soundfile)")
             raise SystemExit(1)
@@ -335,7 +387,7 @@ async def run_bot(transport):
                 voice_id="default",
                 aiohttp_session=session,
             )
-            await _run_pipeline(transport, stt, llm, tts, pcfg["system"], pcfg["greeting"], tools)
+            await _run_pipeline(transport, stt, llm, tts, pcfg["system"], pcfg["greeting"], tools, connected_at=connected_at)
     elif PIPER_BASE_URL:
         from pipecat.services.piper.tts import PiperTTSService
         async with aiohttp.ClientSession() as session:
@@ -343,7 +395,7 @@ async def run_bot(transport):
                 base_url=PIPER_BASE_URL,
                 aiohttp_session=session,
             )
-            await _run_pipeline(transport, stt, llm, tts, pcfg["system"], pcfg["greeting"], tools)
+            await _run_pipeline(transport, stt, llm, tts, pcfg["system"], pcfg["greeting"], tools, connected_at=connected_at)
     else:
         logger.error(
             "Set TTS=kokoro (default) or PIPER_BASE_URL or XTTS_BASE_URL. For Kokoro: uv sync --extra kokoro"
@@ -351,9 +403,45 @@ async def run_bot(transport):
         raise SystemExit(1)
 
 
-async def _run_pipeline(transport, stt, llm, tts, system_content: str, greeting_content: str, tools=None):
+async def build_greeting_bank():
+    """Generate GREETING_VARIANTS greetings per personality with the LLM and render them for both voices (and KOKORO_VOICE)."""
+    import aiohttp
+    from loguru import logger
+    from greeting_bank import generate_texts, load_texts, render_audio, save_texts
+    from kokoro_tts import KokoroTTSService
+
+    tts = KokoroTTSService(lang_code=KOKORO_LANG, speed=KOKORO_SPEED)
+    async with aiohttp.ClientSession() as session:
+        for key, cfg in PERSONALITIES.items():
+            texts = load_texts(GREETING_BANK_DIR, key)
+            if len(texts) < GREETING_VARIANTS:
+                texts += await generate_texts(
+                    session,
+                    cfg["system"],
+                    cfg["greeting"],
+                    GREETING_VARIANTS - len(texts),
+                    base_url=LM_STUDIO_BASE_URL,
+                    model=LM_MODEL,
+                    api_key=OPENAI_API_KEY,
+                )
+                save_texts(GREETING_BANK_DIR, key, texts)
+            voices = {cfg["voice_female"], cfg["voice_male"]}
+            if KOKORO_VOICE.strip():
+                voices.add(KOKORO_VOICE.strip())
+            for voice in sorted(voices):
+                await render_audio(tts, GREETING_BANK_DIR, key, voice, KOKORO_SPEED, texts)
+            logger.info(f"greeting bank: {key}: {len(texts)} greeting(s) in {GREETING_BANK_DIR}")
+
+
+async def _run_pipeline(
+    transport, stt, llm, tts, system_content: str, greeting_content: str, tools=None, greeting=None, connected_at=None
+):
+    """Run the pipeline. `greeting` is an optional banked (text, pcm) played at start instead of an LLM greeting;
+    `connected_at` is the monotonic time the session started (for connect-to-first-audio)."""
     from loguru import logger
     import time
+    if connected_at is None:
+        connected_at = time.monotonic()
     from pipecat.frames.frames import (
         LLMFullResponseEndFrame,
         LLMRunFrame,
@@ -370,11 +458,13 @@ async def _run_pipeline(transport, stt, llm, tts, system_content: str, greeting_
     from pipecat.processors.aggregators.llm_response_universal import LLMContextAggregatorPair
 
     class DevLogObserver(BaseObserver):
-        """Log Whisper transcriptions, LLM generations, and per-request latency (no pipeline change)."""
-        def __init__(self):
+        """Log Whisper transcriptions, LLM generations, and per-request latency (no pipeline change).
+        The first measurement starts at connect, so the greeting reports connect-to-first-audio."""
+        def __init__(self, connected_at: float):
             super().__init__()
             self._llm_buffer = []
-            self._request_start: float | None = None
+            self._request_start: float | None = connected_at
+            self._label = "connect"
             self._first_audio_time: float | None = None
             self._first_audio_seen = False
 
@@ -383,6 +473,7 @@ async def _run_pipeline(transport, stt, llm, tts, system_content: str, greeting_
             now = time.monotonic()
             if isinstance(frame, TranscriptionFrame):
                 self._request_start = now
+                self._label = "latency"
                 self._first_audio_time = None
                 self._first_audio_seen = False
                 logger.info(f"dev | Whisper: {frame.text!r}")
@@ -400,25 +491,21 @@ async def _run_pipeline(transport, stt, llm, tts, system_content: str, greeting_
                 total_ms = (now - self._request_start) * 1000
                 first_ms = (self._first_audio_time - self._request_start) * 1000 if self._first_audio_time is not None else None
                 if first_ms is not None:
-                    logger.info(f"dev | latency: first_audio={first_ms:.0f}ms total={total_ms:.0f}ms")
+                    logger.info(f"dev | {self._label}: first_audio={first_ms:.0f}ms total={total_ms:.0f}ms")
                 else:
-                    logger.info(f"dev | latency: total={total_ms:.0f}ms (no audio)")
+                    logger.info(f"dev | {self._label}: total={total_ms:.0f}ms (no audio)")
                 self._request_start = None
                 self._first_audio_time = None
                 self._first_audio_seen = False
 
     # System + initial user so roles alternate (user/assistant). Stops "Conversation roles must alternate" after first reply.
-    if tools:
-        system_content = system_content.rstrip() + (
-            "\n\nYou have access to MCP tools. "
-            "Before calling a tool, say only one short sentence describing what you are doing (e.g. 'Searching the web for the latest news on Labor Minister.' or 'Checking the opening hours of Shopping on Clyde for you.'). No extra explanation. "
-            "After you have tool results, give a concise summary in plain spoken language. No markdown (no bullets, asterisks, or code). Then suggest exactly two follow-up actions the user might want based on the data (e.g. 'Would you like me to dig into the first article or check another source?'). "
-            "When the user asks for web info: first call the search tool with a query, then for up to 5 result URLs call the fetch_page tool to get full page content, then summarize and offer two follow-up options."
-        )
     messages = [
-        {"role": "system", "content": system_content},
+        {"role": "system", "content": build_system_prompt(system_content, tools)},
         {"role": "user", "content": greeting_content},
     ]
+    if greeting:
+        # Banked greeting stands in for the first assistant turn; no LLM call needed
+        messages.append({"role": "assistant", "content": greeting[0]})
     context = LLMContext(messages, tools=tools) if tools else LLMContext(messages)
     # Use smart-turn in user aggregator (new API); avoid deprecated turn_analyzer on transport
     from pipecat.processors.aggregators.llm_response_universal import LLMUserAggregatorParams
@@ -439,29 +526,75 @@ async def _run_pipeline(transport, stt, llm, tts, system_content: str, greeting_
     user_aggregator = pair.user()
     assistant_aggregator = pair.assistant()
 
-    pipeline = Pipeline(
-        [
-            transport.input(),
-            stt,
-            user_aggregator,
-            llm,
-            tts,
-            transport.output(),
-            assistant_aggregator,
-        ]
-    )
+    processors = [transport.input(), stt, user_aggregator, llm, tts]
+    greeting_player = None
+    if greeting:
+        from greeting_bank import GreetingPlayer
+        from pipecat.transports.local.audio import LocalAudioTransport
+        # Network transports: hold the greeting until the client is connected so it isn't dropped or clipped
+        wait_for_client = not isinstance(transport, LocalAudioTransport)
+        greeting_player = GreetingPlayer(greeting[1], wait_for_client=wait_for_client)
+        processors.append(greeting_player)
+        if wait_for_client:
+            @transport.event_handler("on_client_connected")
+            async def _on_client_connected(transport, client):
+                await greeting_player.client_connected()
+    processors += [transport.output(), assistant_aggregator]
+    pipeline = Pipeline(processors)
+
+    observers = [DevLogObserver(connected_at)]
+    tracer = None
+    if TRACE_ENABLED:
+        from frame_trace import FrameTracer, TraceObserver
+        tracer = FrameTracer(capacity=TRACE_BUFFER_SIZE, sample_every=TRACE_SAMPLE_EVERY)
+        observers.append(TraceObserver(tracer, trace_dir=TRACE_DIR, slow_turn_ms=TRACE_SLOW_TURN_MS))
 
     task = PipelineTask(
         pipeline,
         params=PipelineParams(enable_metrics=True),
-        observers=[DevLogObserver()],
+        observers=observers,
     )
 
-    # Greeting: trigger first LLM response
-    await task.queue_frames([LLMRunFrame()])
+    # Greeting: banked audio plays from GreetingPlayer; otherwise trigger first LLM response
+    if greeting:
+        logger.info(f"dev | greeting (banked): {greeting[0]!r}")
+    else:
+        await task.queue_frames([LLMRunFrame()])
+
+    control_runner = None
+    if CONTROL_PORT:
+        from session_control import SessionController, start_control_server
+        pcfg = get_personality_config()
+        controller = SessionController(
+            context,
+            tts,
+            resolve=get_personality_config,
+            build_system=lambda system: build_system_prompt(system, tools),
+            personalities=list(PERSONALITIES),
+            personality=pcfg["personality"],
+            voice_gender=VOICE_GENDER,
+            speed=KOKORO_SPEED,
+            voice_override=KOKORO_VOICE.strip(),
+            voices=getattr(tts, "loaded_voices", None),
+        )
+        control_runner = await start_control_server(controller, CONTROL_HOST, CONTROL_PORT)
 
     runner = PipelineRunner(handle_sigint=True)
-    await runner.run(task)
+    try:
+        await runner.run(task)
+    finally:
+        if control_runner is not None:
+            await control_runner.cleanup()
+        if tracer is not None:
+            session_dir = os.path.join(TRACE_DIR, f"session-{int(time.time())}")
+            try:
+                paths = tracer.dump_turns(session_dir)
+                logger.info(f"trace | {len(paths)} turn(s) written to {session_dir}")
+                if TRACE_DUMP_SECONDS > 0:
+                    path = tracer.dump_last(TRACE_DUMP_SECONDS, os.path.join(session_dir, "last.json"))
+                    logger.info(f"trace | last {TRACE_DUMP_SECONDS:.0f}s written to {path}")
+            except OSError as e:
+                logger.warning(f"trace | could not write traces to {session_dir}: {e}")
 
 
 async def run_local():
@@ -520,6 +653,8 @@ def main():
             os.environ["KOKORO_SPEED"] = str(args.speed)
         if args.voice_gender is not None:
             os.environ["VOICE_GENDER"] = args.voice_gender
+        if args.trace:
+            os.environ["TRACE"] = "1"
         _reload_config_from_env()
         if run_local_mode:
             asyncio.run(run_local())
@@ -537,8 +672,14 @@ def main():
         os.environ["KOKORO_SPEED"] = str(args.speed)
     if args.voice_gender is not None:
         os.environ["VOICE_GENDER"] = args.voice_gender
+    if args.trace:
+        os.environ["TRACE"] = "1"
     _reload_config_from_env()
 
+    if args.build_greetings:
+        asyncio.run(build_greeting_bank())
+        return
+
     if args.local:
         asyncio.run(run_local())
         return
@@ -0,0 +1,241 @@
+"""
+Frame tracing: record pipeline frame events into a preallocated ring buffer and export Chrome trace JSON.
+Open the dumps in chrome://tracing or https://ui.perfetto.dev to see where a turn spent its time
+across STT, LLM, TTS, and transport. Nothing is attached to the pipeline unless TRACE=1.
+"""
+import asyncio
+import json
+import os
+import time
+from array import array
+from typing import Optional
+
+from loguru import logger
+
+from pipecat.observers.base_observer import BaseObserver, FramePushed
+
+# Turn/speech markers are always recorded, regardless of sampling.
+MARKER_FRAMES = frozenset(
+    {
+        "UserStartedSpeakingFrame",
+        "UserStoppedSpeakingFrame",
+        "TranscriptionFrame",
+        "LLMFullResponseStartFrame",
+        "LLMFullResponseEndFrame",
+        "TTSStartedFrame",
+        "TTSStoppedFrame",
+        "BotStartedSpeakingFrame",
+        "BotStoppedSpeakingFrame",
+        "FunctionCallInProgressFrame",
+        "FunctionCallResultFrame",
+        "InterruptionFrame",
+        "ErrorFrame",
+    }
+)
+
+
+class FrameTracer:
+    """Fixed-size ring buffer of (monotonic ns, turn, processor, frame type, direction) events.
+
+    Slots are allocated once up front; recording overwrites the oldest event when full.
+    Non-marker frames (audio chunks, LLM tokens, ...) are kept one in every `sample_every`.
+    """
+
+    def __init__(self, capacity: int = 65536, sample_every: int = 1):
+        self._capacity = max(1, int(capacity))
+        self._sample_every = max(1, int(sample_every))
+        self._ts = array("q", bytes(8 * self._capacity))
+        self._turn = array("q", bytes(8 * self._capacity))
+        self._processor: list[Optional[str]] = [None] * self._capacity
+        self._frame: list[Optional[str]] = [None] * self._capacity
+        self._direction: list[Optional[str]] = [None] * self._capacity
+        self._next = 0  # Total events written; slot = _next % capacity
+        self._skipped = 0
+        self.turn = 0
+
+    def begin_turn(self) -> int:
+        """Start a new turn; subsequent events are tagged with its id."""
+        self.turn += 1
+        return self.turn
+
+    def record(self, processor: str, frame: str, direction: str, ts_ns: Optional[int] = None, marker: bool = False):
+        """Record one event; `marker` events (see MARKER_FRAMES) bypass sampling."""
+        if not marker and self._sample_every > 1:
+            self._skipped += 1
+            if self._skipped < self._sample_every:
+                return
+            self._skipped = 0
+        i = self._next % self._capacity
+        self._ts[i] = time.monotonic_ns() if ts_ns is None else ts_ns
+        self._turn[i] = self.turn
+        self._processor[i] = processor
+        self._frame[i] = frame
+        self._direction[i] = direction
+        self._next += 1
+
+    def events(self) -> list[tuple[int, int, str, str, str]]:
+        """Buffered events, oldest first, as (ts_ns, turn, processor, frame, direction)."""
+        start = max(0, self._next - self._capacity)
+        out = []
+        for n in range(start, self._next):
+            i = n % self._capacity
+            out.append((self._ts[i], self._turn[i], self._processor[i], self._frame[i], self._direction[i]))
+        return out
+
+    def snapshot(self) -> "FrameTracer":
+        """Copy of the buffer (C-level slice copies) that can be read off the event loop while recording continues."""
+        copy = FrameTracer.__new__(FrameTracer)
+        copy.__dict__.update(self.__dict__)
+        copy._ts = self._ts[:]
+        copy._turn = self._turn[:]
+        copy._processor = self._processor[:]
+        copy._frame = self._frame[:]
+        copy._direction = self._direction[:]
+        return copy
+
+    def turns(self) -> list[int]:
+        """Turn ids still (at least partly) in the buffer, oldest first."""
+        return sorted({e[1] for e in self.events()})
+
+    def turn_events(self, turn: int) -> list[tuple[int, int, str, str, str]]:
+        """Buffered events for one turn (empty if it has already been overwritten)."""
+        return [e for e in self.events() if e[1] == turn]
+
+    def last_events(self, seconds: float) -> list[tuple[int, int, str, str, str]]:
+        """Buffered events from the last `seconds` seconds."""
+        cutoff = time.monotonic_ns() - int(seconds * 1e9)
+        return [e for e in self.events() if e[0] >= cutoff]
+
+    def dump_turn(self, turn: int, path: str) -> str:
+        """Write one turn as Chrome trace JSON; return the path."""
+        return _write_trace(self.turn_events(turn), path)
+
+    def dump_last(self, seconds: float, path: str) -> str:
+        """Write the last `seconds` seconds as Chrome trace JSON; return the path."""
+        return _write_trace(self.last_events(seconds), path)
+
+    def dump_turns(self, directory: str) -> list[str]:
+        """Write every buffered turn to `directory`/turn-<n>.json; return the paths."""
+        events = self.events()
+        by_turn: dict[int, list] = {}
+        for e in events:
+            by_turn.setdefault(e[1], []).append(e)
+        return [_write_trace(evs, os.path.join(directory, f"turn-{turn}.json")) for turn, evs in by_turn.items()]
+
+
+def to_chrome_trace(events: list[tuple[int, int, str, str, str]]) -> dict:
+    """Convert tracer events to Chrome trace format.
+
+    One thread per processor with an instant event per frame, plus a span per (turn, processor)
+    from its first to last frame and a span per turn on the "turns" thread.
+    """
+    trace: list[dict] = [
+        {"ph": "M", "name": "process_name", "pid": 1, "tid": 0, "args": {"name": "spark"}},
+        {"ph": "M", "name": "thread_name", "pid": 1, "tid": 0, "args": {"name": "turns"}},
+    ]
+    if not events:
+        return {"traceEvents": trace, "displayTimeUnit": "ms"}
+    origin = events[0][0]
+    tids: dict[str, int] = {}
+    spans: dict[tuple[int, int], list[int]] = {}
+    for ts_ns, turn, processor, frame, direction in events:
+        tid = tids.get(processor)
+        if tid is None:
+            tid = tids[processor] = len(tids) + 1
+            trace.append({"ph": "M", "name": "thread_name", "pid": 1, "tid": tid, "args": {"name": processor}})
+            trace.append({"ph": "M", "name": "thread_sort_index", "pid": 1, "tid": tid, "args": {"sort_index": tid}})
+        ts_us = (ts_ns - origin) / 1000
+        trace.append(
+            {"ph": "i", "s": "t", "name": frame, "cat": direction, "pid": 1, "tid": tid, "ts": ts_us, "args": {"turn": turn}}
+        )
+        for key in ((turn, tid), (turn, 0)):
+            span = spans.get(key)
+            if span is None:
+                spans[key] = [ts_ns, ts_ns]
+            else:
+                span[1] = ts_ns
+    for (turn, tid), (first, last) in spans.items():
+        trace.append(
+            {
+                "ph": "X",
+                "name": f"turn {turn}",
+                "cat": "turn",
+                "pid": 1,
+                "tid": tid,
+                "ts": (first - origin) / 1000,
+                "dur": (last - first) / 1000,
+                "args": {"turn": turn},
+            }
+        )
+    return {"traceEvents": trace, "displayTimeUnit": "ms"}
+
+
+def _write_trace(events: list[tuple[int, int, str, str, str]], path: str) -> str:
+    parent = os.path.dirname(path)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(to_chrome_trace(events), f)
+    return path
+
+
+class TraceObserver(BaseObserver):
+    """Feeds every pushed frame into a FrameTracer and tracks turns.
+
+    A turn starts when the user starts speaking. When the bot stops speaking, the response latency
+    (user stopped speaking -> bot started speaking) is checked against `slow_turn_ms`; slower turns
+    are dumped to `trace_dir` automatically (0 disables auto-dump).
+    """
+
+    def __init__(self, tracer: FrameTracer, *, trace_dir: str = "traces", slow_turn_ms: int = 0):
+        super().__init__()
+        self.tracer = tracer
+        self._trace_dir = trace_dir
+        self._slow_turn_ms = slow_turn_ms
+        self._user_speaking = False
+        self._user_stopped_ns: Optional[int] = None
+        self._bot_started_ns: Optional[int] = None
+        self._dump_tasks: set[asyncio.Task] = set()
+
+    async def on_push_frame(self, data: FramePushed):
+        tracer = self.tracer
+        now = time.monotonic_ns()
+        name = type(data.frame).__name__
+        if name not in MARKER_FRAMES:
+            tracer.record(data.source.name, name, data.direction.name, now)
+            return
+        # Markers are seen once per hop; the flags keep turn bookkeeping to the first sighting.
+        if name == "UserStartedSpeakingFrame" and not self._user_speaking:
+            self._user_speaking = True
+            self._user_stopped_ns = None
+            self._bot_started_ns = None
+            tracer.begin_turn()
+        tracer.record(data.source.name, name, data.direction.name, now, marker=True)
+        if name == "UserStoppedSpeakingFrame" and self._user_speaking:
+            self._user_speaking = False
+            self._user_stopped_ns = now
+        elif name == "BotStartedSpeakingFrame" and self._bot_started_ns is None:
+            self._bot_started_ns = now
+        elif name == "BotStoppedSpeakingFrame" and self._bot_started_ns is not None:
+            if self._user_stopped_ns is not None:
+                latency_ms = (self._bot_started_ns - self._user_stopped_ns) / 1e6
+                if self._slow_turn_ms and latency_ms >= self._slow_turn_ms:
+                    self._dump_slow_turn(tracer.turn, latency_ms)
+            self._user_stopped_ns = None
+            self._bot_started_ns = None
+
+    def _dump_slow_turn(self, turn: int, latency_ms: float):
+        # Snapshot on the loop (cheap copies); filtering, JSON building, and the write happen in a thread.
+        snapshot = self.tracer.snapshot()
+        path = os.path.join(self._trace_dir, f"turn-{turn}-{int(time.time())}.json")
+
+        async def _dump():
+            try:
+                await asyncio.to_thread(snapshot.dump_turn, turn, path)
+                logger.info(f"trace | slow turn {turn}: {latency_ms:.0f}ms, wrote {path}")
+            except OSError as e:
+                logger.warning(f"trace | could not write {path}: {e}")
+
+        task = asyncio.get_running_loop().create_task(_dump())
+        self._dump_tasks.add(task)
+        task.add_done_callback(self._dump_tasks.discard)
@@ -0,0 +1,187 @@
+"""
+Greeting bank: precomputed greeting text and Kokoro audio per personality, so a session can start
+speaking without waiting for the LLM and TTS.
+Build offline with:  spark --build-greetings
+Layout: <root>/<personality>/texts.json and <root>/<personality>/<voice>@<speed>/<text hash>.wav
+"""
+import hashlib
+import json
+import os
+import random
+import wave
+from typing import Iterable, Optional
+
+import aiohttp
+from loguru import logger
+
+from pipecat.frames.frames import Frame, StartFrame, TTSAudioRawFrame, TTSStartedFrame, TTSStoppedFrame
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+from kokoro_tts import KOKORO_SAMPLE_RATE
+
+# 40 ms of 16-bit mono audio per frame at 24 kHz
+CHUNK_BYTES = KOKORO_SAMPLE_RATE * 2 * 40 // 1000
+
+
+def texts_path(root: str, personality: str) -> str:
+    return os.path.join(root, personality, "texts.json")
+
+
+def audio_path(root: str, personality: str, voice: str, speed: float, text: str) -> str:
+    # Named by text hash so audio can never be paired with a different (regenerated) text
+    digest = hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(root, personality, f"{voice}@{speed:.2f}", f"{digest}.wav")
+
+
+def load_texts(root: str, personality: str) -> list[str]:
+    """Greeting variants stored for a personality (empty if none)."""
+    try:
+        with open(texts_path(root, personality), encoding="utf-8") as f:
+            return [t for t in json.load(f) if isinstance(t, str) and t.strip()]
+    except (OSError, ValueError):
+        return []
+
+
+def save_texts(root: str, personality: str, texts: list[str]):
+    path = texts_path(root, personality)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(texts, f, indent=2, ensure_ascii=False)
+
+
+def read_pcm(path: str) -> bytes:
+    """16-bit mono PCM from a banked WAV. Raises wave.Error/EOFError/OSError if it's unreadable or not in that format."""
+    with wave.open(path, "rb") as w:
+        if (w.getnchannels(), w.getsampwidth(), w.getframerate()) != (1, 2, KOKORO_SAMPLE_RATE):
+            raise wave.Error(f"unexpected format in {path}")
+        pcm = w.readframes(w.getnframes())
+    if not pcm:
+        raise EOFError(f"no audio in {path}")
+    return pcm
+
+
+def write_pcm(path: str, pcm: bytes, sample_rate: int = KOKORO_SAMPLE_RATE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write then rename, so an interrupted build never leaves a truncated WAV behind
+    tmp = path + ".tmp"
+    with wave.open(tmp, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(sample_rate)
+        w.writeframes(pcm)
+    os.replace(tmp, path)
+
+
+async def generate_texts(
+    session: aiohttp.ClientSession, system: str, prompt: str, n: int, *, base_url: str, model: str, api_key: str
+) -> list[str]:
+    """Ask the LLM (OpenAI-compatible /chat/completions) for up to n distinct, complete greetings."""
+    texts: list[str] = []
+    for _ in range(n * 2):
+        if len(texts) >= n:
+            break
+        async with session.post(
+            f"{base_url}/chat/completions",
+            headers={"Authorization": f"Bearer {api_key}"},
+            json={
+                "model": model,
+                "messages": [{"role": "system", "content": system}, {"role": "user", "content": prompt}],
+                "temperature": 1.0,
+            },
+            timeout=aiohttp.ClientTimeout(total=120),
+        ) as resp:
+            resp.raise_for_status()
+            choice = (await resp.json())["choices"][0]
+        if choice.get("finish_reason") == "length":
+            continue  # Cut off mid-sentence; don't bank it
+        text = (choice["message"].get("content") or "").strip()
+        if text and text not in texts:
+            texts.append(text)
+    return texts
+
+
+async def render_audio(tts, root: str, personality: str, voice: str, speed: float, texts: Iterable[str]) -> int:
+    """Render any of `texts` missing for (voice, speed) with a KokoroTTSService; return how many were rendered."""
+    tts.switch_voice(voice=voice, speed=speed)
+    rendered = 0
+    for text in texts:
+        path = audio_path(root, personality, voice, speed, text)
+        if os.path.exists(path):
+            continue
+        pcm = await tts.synthesize(text)
+        if pcm:
+            write_pcm(path, pcm)
+            rendered += 1
+    return rendered
+
+
+async def prepare_greeting(tts, root: str, personality: str, voice: str, speed: float) -> Optional[tuple[str, bytes]]:
+    """Pick a greeting (text, pcm) for this session.
+
+    Prefers a variant already rendered for (voice, speed). If there is none, renders just one variant and
+    caches it; `spark --build-greetings` renders the rest. Returns None when no texts are banked for the
+    personality or the cache can't be used (synthesis failure, corrupt WAV), so the caller falls back to the LLM.
+    """
+    texts = load_texts(root, personality)
+    if not texts:
+        logger.info(f"greeting bank: no greetings for {personality!r} in {root}; run  spark --build-greetings")
+        return None
+    cached = [t for t in texts if os.path.exists(audio_path(root, personality, voice, speed, t))]
+    if cached:
+        text = random.choice(cached)
+    else:
+        text = random.choice(texts)
+        try:
+            if not await render_audio(tts, root, personality, voice, speed, [text]):
+                return None
+        except Exception as e:
+            logger.warning(f"greeting bank: could not render greeting for {personality}/{voice}: {e}; using the LLM")
+            return None
+        logger.info(
+            f"greeting bank: rendered 1 greeting for {personality}/{voice}@{speed:.2f}; "
+            "run  spark --build-greetings  to render all variants"
+        )
+    path = audio_path(root, personality, voice, speed, text)
+    try:
+        return text, read_pcm(path)
+    except (wave.Error, EOFError, OSError) as e:
+        logger.warning(f"greeting bank: removing unreadable {path} ({e}); using the LLM")
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return None
+
+
+class GreetingPlayer(FrameProcessor):
+    """Plays a precomputed greeting as TTS audio once the pipeline has started. Place right after TTS.
+
+    With `wait_for_client`, playback also waits for client_connected() (call it from the transport's
+    on_client_connected handler) so audio isn't sent before a remote peer can receive it.
+    """
+
+    def __init__(self, pcm: bytes, sample_rate: int = KOKORO_SAMPLE_RATE, *, wait_for_client: bool = False, **kwargs):
+        super().__init__(**kwargs)
+        self._pcm = pcm
+        self._sample_rate = sample_rate
+        self._started = False
+        self._client_ready = not wait_for_client
+
+    async def client_connected(self):
+        self._client_ready = True
+        await self._maybe_play()
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+        await self.push_frame(frame, direction)
+        if isinstance(frame, StartFrame):
+            self._started = True
+            await self._maybe_play()
+
+    async def _maybe_play(self):
+        if self._started and self._client_ready and self._pcm:
+            pcm, self._pcm = self._pcm, b""
+            await self.push_frame(TTSStartedFrame())
+            for i in range(0, len(pcm), CHUNK_BYTES):
+                await self.push_frame(TTSAudioRawFrame(pcm[i : i + CHUNK_BYTES], self._sample_rate, 1))
+            await self.push_frame(TTSStoppedFrame())
@@ -7,7 +7,7 @@ affect speech speed only; they are stripped before synthesis.
 """
 import asyncio
 import re
-from typing import AsyncGenerator, Optional, Tuple
+from typing import AsyncGenerator, Iterable, Optional, Tuple
 
 from loguru import logger
 
@@ -62,6 +62,7 @@ class KokoroTTSService(TTSService):
         self._lang_code = lang_code
         self._base_speed = max(0.5, min(2.0, float(speed)))
         self._pipeline = None
+        self.loaded_voices: set[str] = set()
 
     def _ensure_pipeline(self):
         if self._pipeline is None:
@@ -72,12 +73,63 @@ class KokoroTTSService(TTSService):
                 logger.error(f"Kokoro not installed: {e}. Install with: pip install kokoro soundfile")
                 raise
 
+    async def preload_voices(self, voices: Iterable[str]) -> set[str]:
+        """Load the Kokoro model and the given voicepacks up front so later voice switches are instant.
+        Voices that fail to load are logged and skipped; returns the voices now loaded."""
+        names = sorted({v for v in voices if v})
+
+        def _load():
+            self._ensure_pipeline()
+            for name in names:
+                try:
+                    self._pipeline.load_voice(name)
+                    self.loaded_voices.add(name)
+                except Exception as e:
+                    logger.warning(f"{self}: could not load voice {name!r}: {e}")
+
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, _load)
+        logger.info(f"{self}: preloaded voices {', '.join(sorted(self.loaded_voices))}")
+        return self.loaded_voices
+
+    def switch_voice(self, voice: Optional[str] = None, speed: Optional[float] = None):
+        """Change voice and/or base speed on a running service; applies from the next phrase."""
+        if voice:
+            self._voice = voice
+        if speed is not None:
+            self._base_speed = max(0.5, min(2.0, float(speed)))
+
+    def _synthesize_pcm(self, text: str, voice: str, speed: float) -> bytes:
+        """Synchronous Kokoro synthesis to 16-bit mono PCM at KOKORO_SAMPLE_RATE."""
+        import numpy as np
+        chunks = []
+        for _gs, _ps, audio in self._pipeline(text, voice=voice, speed=speed):
+            # Kokoro may return a PyTorch tensor; convert to numpy for int16
+            if hasattr(audio, "cpu"):
+                audio = audio.cpu().numpy()
+            audio = np.asarray(audio, dtype=np.float32)
+            audio_int16 = (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16)
+            chunks.append(audio_int16.tobytes())
+        return b"".join(chunks)
+
+    async def synthesize(self, text: str) -> bytes:
+        """Render text to PCM outside the pipeline (current voice and speed, emotes applied)."""
+        clean_text, emote_speed = _strip_voice_emote(text)
+        if not clean_text:
+            return b""
+        self._ensure_pipeline()
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(
+            None, self._synthesize_pcm, clean_text, self._voice, self._base_speed * emote_speed
+        )
+
     async def run_tts(self, text: str) -> AsyncGenerator[Frame, None]:
         """Generate speech from text using Kokoro. Strips (excited)/(calm) etc. and applies speed."""
         clean_text, emote_speed = _strip_voice_emote(text)
         if not clean_text:
             return
         segment_speed = self._base_speed * emote_speed
+        voice = self._voice
         logger.debug(
             f"{self}: Generating TTS [{clean_text[:80]}...] (speed={segment_speed:.2f})"
             if len(clean_text) > 80
@@ -90,20 +142,8 @@ class KokoroTTSService(TTSService):
             await self.stop_ttfb_metrics()
 
             # Run Kokoro in a thread (it's synchronous)
-            def _synthesize():
-                import numpy as np
-                chunks = []
-                for _gs, _ps, audio in self._pipeline(clean_text, voice=self._voice, speed=segment_speed):
-                    # Kokoro may return a PyTorch tensor; convert to numpy for int16
-                    if hasattr(audio, "cpu"):
-                        audio = audio.cpu().numpy()
-                    audio = np.asarray(audio, dtype=np.float32)
-                    audio_int16 = (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16)
-                    chunks.append(audio_int16.tobytes())
-                return b"".join(chunks)
-
             loop = asyncio.get_event_loop()
-            audio_bytes = await loop.run_in_executor(None, _synthesize)
+            audio_bytes = await loop.run_in_executor(None, self._synthesize_pcm, clean_text, voice, segment_speed)
 
             if audio_bytes:
                 chunk_size = self.chunk_size
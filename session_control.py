@@ -0,0 +1,176 @@
+"""
+Runtime control for a live session: switch personality, Kokoro voice, and speed without rebuilding the pipeline.
+Served on a local HTTP endpoint when CONTROL_PORT is set:
+  curl localhost:7861/session
+  curl -X POST localhost:7861/session -d '{"personality": "jarvis", "voice_gender": "male", "speed": 1.2}'
+"""
+from typing import Callable, Collection, Optional
+
+from aiohttp import web
+from loguru import logger
+
+# Distinguishes "field not sent" from an explicit null (which clears the voice override).
+UNSET = object()
+
+
+class SessionController:
+    """Applies personality/voice/speed changes to a running pipeline.
+
+    The system message is rewritten in place in the live LLMContext (history is kept), and the
+    TTS voice and speed are switched on the service itself when it supports it (Kokoro).
+    Only voices in `voices` (the preloaded set) or the session's starting voice can be selected.
+    `voices=None` means the TTS can't switch voice or speed (Piper/XTTS); only the personality changes.
+    """
+
+    def __init__(
+        self,
+        context,
+        tts,
+        *,
+        resolve: Callable[[str, str], dict],
+        build_system: Callable[[str], str],
+        personalities: list[str],
+        personality: str,
+        voice_gender: str = "",
+        speed: float = 1.0,
+        voice_override: str = "",
+        voices: Optional[Collection[str]] = None,
+    ):
+        self._context = context
+        self._tts = tts
+        self._resolve = resolve
+        self._build_system = build_system
+        self._personalities = personalities
+        self._personality = personality
+        self._voice_gender = voice_gender
+        self._speed = speed
+        self._voice_override = voice_override
+        self._voices = voices
+        self._voice = voice_override or resolve(personality, voice_gender)["voice"]
+        self._start_voice = self._voice
+
+    def state(self) -> dict:
+        if self._voices is None:
+            return {"personality": self._personality, "voice_switching": False}
+        return {
+            "personality": self._personality,
+            "voice_gender": self._voice_gender or "default",
+            "voice": self._voice,
+            "speed": self._speed,
+            "voice_switching": True,
+        }
+
+    def apply(
+        self,
+        personality: Optional[str] = None,
+        voice_gender: Optional[str] = None,
+        speed: Optional[float] = None,
+        voice=UNSET,
+    ) -> dict:
+        """Switch any of personality, voice gender, explicit voice, and speed. Raises ValueError on bad input.
+
+        `voice` set to None, "" or "default" clears an explicit voice so the personality's voice applies again.
+        """
+        if self._voices is None and (voice_gender is not None or speed is not None or voice not in (UNSET, None, "")):
+            raise ValueError("this TTS does not support switching voice or speed; only personality can change")
+        if personality is not None:
+            personality = str(personality).strip().lower()
+            if personality not in self._personalities:
+                raise ValueError(f"unknown personality {personality!r}")
+        if voice_gender is not None:
+            voice_gender = str(voice_gender).strip().lower()
+            if voice_gender == "default":
+                voice_gender = ""
+            if voice_gender not in ("", "male", "female"):
+                raise ValueError("voice_gender must be male, female, or default")
+        if speed is not None:
+            try:
+                speed = float(speed)
+            except (TypeError, ValueError):
+                raise ValueError("speed must be a number") from None
+            if not 0.5 <= speed <= 2.0:
+                raise ValueError("speed must be between 0.5 and 2.0")
+        voice_override = self._voice_override
+        if voice is not UNSET:
+            voice_override = "" if voice is None else str(voice).strip()
+            if voice_override.lower() == "default":
+                voice_override = ""
+
+        new_personality = self._personality if personality is None else personality
+        new_gender = self._voice_gender if voice_gender is None else voice_gender
+        cfg = self._resolve(new_personality, new_gender)
+        voice_fields_sent = personality is not None or voice_gender is not None or voice is not UNSET
+        new_voice = (voice_override or cfg["voice"]) if voice_fields_sent else self._voice
+        if (
+            self._voices is not None
+            and new_voice != self._voice
+            and new_voice != self._start_voice
+            and new_voice not in self._voices
+        ):
+            if voice_override:
+                raise ValueError(f"voice {new_voice!r} is not loaded; available: {', '.join(sorted(self._voices))}")
+            # The personality/gender voice failed to preload: still switch the prompt, keep the current voice.
+            logger.warning(f"control | voice {new_voice!r} is not loaded; keeping {self._voice!r}")
+            new_voice = self._voice
+
+        self._personality = new_personality
+        self._voice_gender = new_gender
+        if speed is not None:
+            self._speed = speed
+        self._voice_override = voice_override
+        self._voice = new_voice
+        if personality is not None:
+            self._set_system(self._build_system(cfg["system"]))
+        if self._voices is not None:
+            self._tts.switch_voice(voice=self._voice, speed=self._speed)
+        if self._voices is not None:
+            logger.info(f"control | personality={self._personality} voice={self._voice} speed={self._speed:.2f}")
+        else:
+            logger.info(f"control | personality={self._personality}")
+        return self.state()
+
+    def _set_system(self, content: str):
+        for message in self._context.messages:
+            if message.get("role") == "system":
+                message["content"] = content
+                return
+        self._context.messages.insert(0, {"role": "system", "content": content})
+
+
+async def start_control_server(controller: SessionController, host: str, port: int) -> Optional[web.AppRunner]:
+    """Serve GET/POST /session for `controller`. Returns the runner to clean up, or None if the port is taken."""
+
+    async def get_session(request: web.Request) -> web.Response:
+        return web.json_response(controller.state())
+
+    async def post_session(request: web.Request) -> web.Response:
+        try:
+            body = await request.json()
+        except ValueError:
+            return web.json_response({"error": "body must be JSON"}, status=400)
+        if not isinstance(body, dict):
+            return web.json_response({"error": "body must be a JSON object"}, status=400)
+        try:
+            state = controller.apply(
+                personality=body.get("personality"),
+                voice_gender=body.get("voice_gender"),
+                speed=body.get("speed"),
+                voice=body.get("voice", UNSET),
+            )
+        except ValueError as e:
+            return web.json_response({"error": str(e)}, status=400)
+        return web.json_response(state)
+
+    app = web.Application()
+    app.router.add_get("/session", get_session)
+    app.router.add_post("/session", post_session)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, host, port).start()
+    except OSError as e:
+        logger.warning(f"control | could not listen on {host}:{port} ({e}); runtime control disabled for this session")
+        await runner.cleanup()
+        return None
+    logger.info(f"control | listening on http://{host}:{port}/session")
+    return runner